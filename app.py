@@ -2,17 +2,25 @@ import io
 import os
 import json
 import zipfile
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
-from typing import List
+from itertools import count
+from string import Formatter
+from typing import List, Tuple
 
+import numpy as np
 import pandas as pd
+import polars as pl
+import pyarrow as pa
+import pyarrow.csv as pacsv
 import streamlit as st
 from reportlab.lib.pagesizes import A4
 from reportlab.pdfgen import canvas
 from reportlab.lib.units import mm
 from reportlab.lib.utils import ImageReader
 
-DATA_PATH = "students_sample.csv"
+DATA_PATH = "students.parquet"
+LEGACY_CSV_PATH = "students_sample.csv"
 CONFIG_PATH = "config.json"
 RECEIPTS_DIR = "receipts"
 
@@ -34,123 +42,299 @@ REQUIRED_COLS = [
     "SILAT_STATUS","SILAT_AMOUNT","SILAT_DATE"
 ]
 
+AMOUNT_COLS = ["MENGAJI_AMOUNT","SILAT_AMOUNT"]
+
+# low-cardinality columns kept as category dtype: integer-code comparisons
+# for the status filters and a fraction of the string memory
+CATEGORY_COLS = ["TINGKATAN","KELAS","MENGAJI_STATUS","SILAT_STATUS"]
+STATUS_VALUES = ["Belum Bayar","Sudah Bayar"]
+
+# per-column dtypes so read_csv skips type inference
+CSV_DTYPES = {col: ("float64" if col in AMOUNT_COLS else str) for col in REQUIRED_COLS}
+
 # ----------------- helpers -----------------
-def load_config():
+def _file_mtime(path: str) -> float:
+    # cache key: changes whenever the file on disk changes
+    return os.path.getmtime(path) if os.path.exists(path) else 0.0
+
+@st.cache_data(show_spinner=False)
+def _load_config_cached(mtime: float):
     if os.path.exists(CONFIG_PATH):
         with open(CONFIG_PATH, "r", encoding="utf-8") as f:
             return json.load(f)
     return DEFAULT_CONFIG.copy()
 
+def load_config():
+    return _load_config_cached(_file_mtime(CONFIG_PATH))
+
 def save_config(cfg):
     with open(CONFIG_PATH, "w", encoding="utf-8") as f:
         json.dump(cfg, f, ensure_ascii=False, indent=2)
+    st.cache_data.clear()
 
 def ensure_columns(df: pd.DataFrame) -> pd.DataFrame:
+    # fast path: columns already there with the right dtypes, nothing to convert
+    if all(col in df.columns for col in REQUIRED_COLS) and \
+       all(df[col].dtype == "float64" for col in AMOUNT_COLS) and \
+       all(isinstance(df[col].dtype, pd.CategoricalDtype) for col in CATEGORY_COLS) and \
+       all(set(STATUS_VALUES) <= set(df[col].cat.categories)
+           for col in CATEGORY_COLS if col.endswith("_STATUS")):
+        return df[REQUIRED_COLS]
     for col in REQUIRED_COLS:
         if col not in df.columns:
             df[col] = ""
-    df["MENGAJI_AMOUNT"] = pd.to_numeric(df["MENGAJI_AMOUNT"], errors="coerce").fillna(0.0)
-    df["SILAT_AMOUNT"] = pd.to_numeric(df["SILAT_AMOUNT"], errors="coerce").fillna(0.0)
+    for col in AMOUNT_COLS:
+        if np.issubdtype(df[col].dtype, np.floating):
+            # already numeric: no string-parsing pass, just patch the holes
+            df[col] = df[col].fillna(0.0)
+        else:
+            df[col] = pd.to_numeric(df[col], errors="coerce").fillna(0.0)
+    for col in CATEGORY_COLS:
+        if not isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype(str).astype("category")
+        if col.endswith("_STATUS"):
+            # both statuses must always be assignable, even if only one occurs
+            df[col] = df[col].cat.add_categories(
+                [v for v in STATUS_VALUES if v not in df[col].cat.categories])
     return df[REQUIRED_COLS]
 
-def load_students():
+def _students_mtime() -> float:
+    # cache key covering both the parquet store and a not-yet-migrated CSV
+    return max(_file_mtime(DATA_PATH), _file_mtime(LEGACY_CSV_PATH))
+
+@st.cache_data(show_spinner=False)
+def _load_students_cached(mtime: float) -> pd.DataFrame:
     if os.path.exists(DATA_PATH):
-        df = pd.read_csv(DATA_PATH, dtype=str, keep_default_na=False)
-        for col in ["MENGAJI_AMOUNT","SILAT_AMOUNT"]:
-            df[col] = pd.to_numeric(df[col], errors="coerce").fillna(0.0)
+        return ensure_columns(pd.read_parquet(DATA_PATH, engine="pyarrow"))
+    # first run on an old install: fall back to the legacy CSV
+    if os.path.exists(LEGACY_CSV_PATH):
+        df = pd.read_csv(
+            LEGACY_CSV_PATH,
+            dtype=CSV_DTYPES,
+            usecols=lambda c: c in REQUIRED_COLS,
+            keep_default_na=False,
+            na_values={col: [""] for col in AMOUNT_COLS},
+            engine="c",
+        )
+        for col in AMOUNT_COLS:
+            df[col] = df[col].fillna(0.0)
         return ensure_columns(df)
     return ensure_columns(pd.DataFrame(columns=REQUIRED_COLS))
 
+def load_students() -> pd.DataFrame:
+    return _load_students_cached(_students_mtime())
+
+SEARCH_COLS = ["NAMA","NO_KP","TINGKATAN","KELAS"]
+
+@st.cache_data(show_spinner=False)
+def _students_polars(mtime: float) -> pl.DataFrame:
+    return pl.from_pandas(_load_students_cached(mtime))
+
+def search_students(query: str, mtime: float) -> pd.DataFrame:
+    # Polars runs the contains kernels multithreaded over all search columns
+    # in one pass, instead of pandas' per-column Python-level str machinery
+    s = query.lower()
+    mask = pl.any_horizontal([
+        pl.col(c).cast(pl.String).str.to_lowercase().str.contains(s, literal=True)
+        for c in SEARCH_COLS
+    ])
+    return _students_polars(mtime).lazy().filter(mask).collect().to_pandas()
+
 def save_students(df: pd.DataFrame):
-    df.to_csv(DATA_PATH, index=False)
+    df.to_parquet(DATA_PATH, engine="pyarrow", compression="zstd", index=False)
+    st.cache_data.clear()
+    st.session_state.df = df
+
+def sum_paid(df: pd.DataFrame, amt_col: str, status_col: str) -> float:
+    # reduction over the category integer codes; stays in NumPy kernels
+    amounts = df[amt_col].to_numpy()
+    status = df[status_col]
+    if isinstance(status.dtype, pd.CategoricalDtype):
+        if "Sudah Bayar" not in status.cat.categories:
+            return 0.0
+        mask = status.cat.codes.to_numpy() == status.cat.categories.get_loc("Sudah Bayar")
+    else:
+        mask = (status == "Sudah Bayar").to_numpy()
+    return float(amounts[mask].sum()) if len(amounts) else 0.0
+
+def receipt_no_seq(prefix: str):
+    # one strftime per batch; the counter suffix keeps numbers unique even
+    # when a whole bulk run lands inside the same second
+    base = f"{prefix}-{datetime.now().strftime('%Y%m%d-%H%M%S')}"
+    for i in count(1):
+        yield f"{base}-{i:04d}"
 
 def next_receipt_no(prefix: str) -> str:
-    # unique enough for our use
-    return f"{prefix}-{datetime.now().strftime('%Y%m%d-%H%M%S')}"
+    return next(receipt_no_seq(prefix))
 
 # -------------- receipt drawing --------------
-def draw_receipt_page(c, cfg: dict, student: dict, fee_type: str, amount: float, paid_date: str, receipt_no: str):
+def _compile_template(template: str):
+    # pre-parse the {PLACEHOLDER} template once so per-row rendering is a
+    # join over literal/field segments instead of a fresh format parse
+    segments = [(literal, field, spec or "")
+                for literal, field, spec, _ in Formatter().parse(template)]
+    def render(values: dict) -> str:
+        parts = []
+        for literal, field, spec in segments:
+            parts.append(literal)
+            if field is not None:
+                parts.append(format(values.get(field, ""), spec))
+        return "".join(parts)
+    return render
+
+@st.cache_resource(show_spinner=False)
+def _logo_reader(path: str, mtime: float):
+    # ImageReader decodes the image; keep one instance per logo file
+    try:
+        return ImageReader(path)
+    except Exception:
+        return None
+
+def resolve_receipt_cfg(cfg: dict) -> dict:
+    # resolve all cfg lookups once per document, not once per page
+    logo_path = cfg.get("receipt_logo_path")
+    logo = _logo_reader(logo_path, _file_mtime(logo_path)) if logo_path else None
+    return {
+        "branding_text": cfg.get("branding_text",""),
+        "footer": cfg.get("receipt_footer",""),
+        "currency": cfg.get("currency","RM"),
+        "left_labels": cfg.get("receipt_left_label_block", DEFAULT_CONFIG["receipt_left_label_block"]),
+        "render_right": _compile_template(cfg.get("receipt_right_label_block", DEFAULT_CONFIG["receipt_right_label_block"])),
+        "logo": logo,
+    }
+
+# layout constants shared by the static template and the variable overlay
+_MARGIN = 18*mm
+_ROW_H = 7*mm
+_BODY_TOP = A4[1] - _MARGIN - 25*mm
+
+def _draw_static_template(c, rcfg: dict):
+    # everything invariant across pages: logo, branding, rules, left labels, footer
     width, height = A4
-    margin = 18*mm
+    margin = _MARGIN
     y = height - margin
 
-    if cfg.get("receipt_logo_path"):
+    if rcfg["logo"] is not None:
         try:
-            logo = ImageReader(cfg["receipt_logo_path"])
-            c.drawImage(logo, margin, y-20*mm, width=20*mm, height=20*mm, preserveAspectRatio=True, mask='auto')
+            c.drawImage(rcfg["logo"], margin, y-20*mm, width=20*mm, height=20*mm, preserveAspectRatio=True, mask='auto')
             c.setFont("Helvetica-Bold", 16)
-            c.drawString(margin+25*mm, y-10*mm, cfg.get("branding_text",""))
+            c.drawString(margin+25*mm, y-10*mm, rcfg["branding_text"])
         except Exception:
             c.setFont("Helvetica-Bold", 16)
-            c.drawString(margin, y-10*mm, cfg.get("branding_text",""))
+            c.drawString(margin, y-10*mm, rcfg["branding_text"])
     else:
         c.setFont("Helvetica-Bold", 16)
-        c.drawString(margin, y-10*mm, cfg.get("branding_text",""))
+        c.drawString(margin, y-10*mm, rcfg["branding_text"])
 
     c.setFont("Helvetica", 11)
     c.drawRightString(width - margin, y-10*mm, "RESIT PEMBAYARAN YURAN")
     c.line(margin, y-12*mm, width - margin, y-12*mm)
 
-    left_labels = cfg.get("receipt_left_label_block", DEFAULT_CONFIG["receipt_left_label_block"])
-    right_labels = cfg.get("receipt_right_label_block", DEFAULT_CONFIG["receipt_right_label_block"])
-
-    formatted_right = right_labels.format(
-        NAMA=student["NAMA"],
-        NO_KP=student["NO_KP"],
-        TINGKATAN=student["TINGKATAN"],
-        KELAS=student["KELAS"],
-        FEE_TYPE=fee_type,
-        AMOUNT=float(amount),
-        DATE=paid_date if paid_date else datetime.now().strftime("%Y-%m-%d"),
-        RECEIPT_NO=receipt_no,
-        CURRENCY=cfg.get("currency","RM")
-    )
-
-    top = y - 25*mm
-    row_h = 7*mm
-    left_lines = left_labels.split("\n")
-    right_lines = formatted_right.split("\n")
-    for i in range(max(len(left_lines), len(right_lines))):
-        y_line = top - i*row_h
-        c.setFont("Helvetica", 11)
-        c.drawString(margin, y_line, left_lines[i] if i < len(left_lines) else "")
-        c.drawString(width/2, y_line, right_lines[i] if i < len(right_lines) else "")
+    c.setFont("Helvetica", 11)
+    for i, line in enumerate(rcfg["left_labels"].split("\n")):
+        c.drawString(margin, _BODY_TOP - i*_ROW_H, line)
 
     c.line(margin, 25*mm, width - margin, 25*mm)
     c.setFont("Helvetica-Oblique", 9)
-    c.drawString(margin, 20*mm, cfg.get("receipt_footer",""))
+    c.drawString(margin, 20*mm, rcfg["footer"])
+
+def _format_right_lines(rcfg: dict, student: dict, fee_type: str, amount: float, paid_date: str, receipt_no: str) -> List[str]:
+    formatted = rcfg["render_right"]({
+        "NAMA": student["NAMA"],
+        "NO_KP": student["NO_KP"],
+        "TINGKATAN": student["TINGKATAN"],
+        "KELAS": student["KELAS"],
+        "FEE_TYPE": fee_type,
+        "AMOUNT": float(amount),
+        "DATE": paid_date if paid_date else datetime.now().strftime("%Y-%m-%d"),
+        "RECEIPT_NO": receipt_no,
+        "CURRENCY": rcfg["currency"],
+    })
+    return formatted.split("\n")
+
+def _draw_variable(c, right_lines: List[str]):
+    # only the per-student right column changes between pages
+    width, _ = A4
+    c.setFont("Helvetica", 11)
+    for i, line in enumerate(right_lines):
+        c.drawString(width/2, _BODY_TOP - i*_ROW_H, line)
+
+def draw_receipt_page(c, rcfg: dict, student: dict, fee_type: str, amount: float, paid_date: str, receipt_no: str):
+    _draw_static_template(c, rcfg)
+    _draw_variable(c, _format_right_lines(rcfg, student, fee_type, amount, paid_date, receipt_no))
 
-def generate_single_pdf_bytes(cfg: dict, student_row: pd.Series, fee_type_key: str) -> bytes:
+def _render_to_buffer(buf: io.BytesIO, cfg: dict, student: dict, fee_type_key: str, receipt_no: str = None):
+    # Canvas objects are single-use, but the output buffer can be recycled
+    buf.seek(0)
+    buf.truncate(0)
     fee_map = {"MENGAJI": ("MENGAJI_AMOUNT","MENGAJI_DATE"),
                "SILAT": ("SILAT_AMOUNT","SILAT_DATE")}
     label_map = {"MENGAJI": cfg["ui_labels"]["mengaji"],
                  "SILAT": cfg["ui_labels"]["silat"]}
 
     amt_col, date_col = fee_map[fee_type_key]
-    amount = float(student_row[amt_col])
-    paid_date = str(student_row[date_col]) if str(student_row[date_col]) else datetime.now().strftime("%Y-%m-%d")
-    receipt_no = next_receipt_no(cfg.get("receipt_prefix","DN"))
+    amount = float(student[amt_col])
+    paid_date = str(student[date_col]) if str(student[date_col]) else datetime.now().strftime("%Y-%m-%d")
+    if receipt_no is None:
+        receipt_no = next_receipt_no(cfg.get("receipt_prefix","DN"))
 
-    buf = io.BytesIO()
     c = canvas.Canvas(buf, pagesize=A4)
-    draw_receipt_page(c, cfg, student_row.to_dict(), label_map[fee_type_key], amount, paid_date, receipt_no)
+    draw_receipt_page(c, resolve_receipt_cfg(cfg), student, label_map[fee_type_key], amount, paid_date, receipt_no)
     c.showPage()
     c.save()
+
+def generate_single_pdf_bytes(cfg: dict, student: dict, fee_type_key: str, receipt_no: str = None) -> bytes:
+    buf = io.BytesIO()
+    _render_to_buffer(buf, cfg, student, fee_type_key, receipt_no)
     return buf.getvalue()
 
+def _render_one(args) -> Tuple[str, bytes]:
+    # module-level so ProcessPoolExecutor can pickle it
+    cfg, rec, fee_type_key, receipt_no = args
+    safe_name = rec["NAMA"].replace(" ", "_")
+    return safe_name, generate_single_pdf_bytes(cfg, rec, fee_type_key, receipt_no)
+
+def render_receipts_parallel(cfg: dict, records: List[dict], fee_type_key: str) -> List[Tuple[str, bytes]]:
+    # pages are independent; ReportLab rendering is CPU-bound and scales with cores.
+    # receipt numbers come from one sequence so workers can't collide
+    recno = receipt_no_seq(cfg.get("receipt_prefix","DN"))
+    args = [(cfg, rec, fee_type_key, next(recno)) for rec in records]
+    if len(records) <= 1:
+        # sequential fallback: recycle one buffer instead of one per receipt
+        buf = io.BytesIO()
+        out = []
+        for _, rec, _, receipt_no in args:
+            _render_to_buffer(buf, cfg, rec, fee_type_key, receipt_no)
+            out.append((rec["NAMA"].replace(" ", "_"), buf.getvalue()))
+        return out
+    with ProcessPoolExecutor(max_workers=min(os.cpu_count() or 1, len(records))) as ex:
+        return list(ex.map(_render_one, args))
+
 def generate_bulk_one_pdf(cfg: dict, students: pd.DataFrame, fee_type_key: str) -> bytes:
     fee_map = {"MENGAJI": ("MENGAJI_AMOUNT","MENGAJI_DATE"),
                "SILAT": ("SILAT_AMOUNT","SILAT_DATE")}
     label_map = {"MENGAJI": cfg["ui_labels"]["mengaji"],
                  "SILAT": cfg["ui_labels"]["silat"]}
+    amt_col, date_col = fee_map[fee_type_key]
+    label = label_map[fee_type_key]
+    recno = receipt_no_seq(cfg.get("receipt_prefix","DN"))
+    today = datetime.now().strftime("%Y-%m-%d")
+    rcfg = resolve_receipt_cfg(cfg)
+    # one plain-dict conversion up front beats a Series allocation per row
+    records = students[["NAMA","NO_KP","TINGKATAN","KELAS", amt_col, date_col]].to_dict("records")
     buf = io.BytesIO()
     c = canvas.Canvas(buf, pagesize=A4)
-    for _, row in students.iterrows():
-        amt_col, date_col = fee_map[fee_type_key]
-        amount = float(row[amt_col])
-        paid_date = str(row[date_col]) if str(row[date_col]) else datetime.now().strftime("%Y-%m-%d")
-        receipt_no = next_receipt_no(cfg.get("receipt_prefix","DN"))
-        draw_receipt_page(c, cfg, row.to_dict(), label_map[fee_type_key], amount, paid_date, receipt_no)
+    # record the static layout once as a form XObject; pages just stamp it
+    width, height = A4
+    c.beginForm("receipt_bg", 0, 0, width, height)
+    _draw_static_template(c, rcfg)
+    c.endForm()
+    for rec in records:
+        amount = float(rec[amt_col])
+        paid_date = str(rec[date_col]) if str(rec[date_col]) else today
+        receipt_no = next(recno)
+        c.doForm("receipt_bg")
+        _draw_variable(c, _format_right_lines(rcfg, rec, label, amount, paid_date, receipt_no))
         c.showPage()
     c.save()
     return buf.getvalue()
@@ -158,6 +342,10 @@ def generate_bulk_one_pdf(cfg: dict, students: pd.DataFrame, fee_type_key: str)
 # ----------------- UI -----------------
 st.set_page_config(page_title="Sistem Yuran", layout="wide")
 cfg = load_config()
+# one shared frame per session; every tab reads this handle and
+# save_students writes it back, so a rerun touches the loader at most once
+if "df" not in st.session_state:
+    st.session_state.df = load_students()
 st.title(cfg.get("app_title", DEFAULT_CONFIG["app_title"]))
 
 tab_import, tab_data, tab_receipt, tab_settings = st.tabs(["📥 Import/Export", "📋 Data Pelajar", "🧾 Resit & Cetak", "⚙️ Tetapan"])
@@ -169,13 +357,29 @@ with tab_import:
         st.write("**Muat Naik CSV (gantikan data sedia ada)**")
         up = st.file_uploader("Pilih fail CSV", type=["csv"], key="upload_csv")
         if up is not None:
-            df_new = pd.read_csv(up, dtype=str, keep_default_na=False)
+            # Arrow parses multi-threaded, much faster than the C engine on big files;
+            # fall back to pandas for ragged/odd files Arrow refuses to read
+            try:
+                table = pacsv.read_csv(
+                    up,
+                    convert_options=pacsv.ConvertOptions(
+                        column_types={col: (pa.float64() if col in AMOUNT_COLS else pa.string())
+                                      for col in REQUIRED_COLS},
+                    ),
+                )
+                df_new = table.to_pandas()
+                for col in AMOUNT_COLS:
+                    if col in df_new.columns:
+                        df_new[col] = df_new[col].fillna(0.0)
+            except pa.ArrowInvalid:
+                up.seek(0)
+                df_new = pd.read_csv(up, dtype=str, keep_default_na=False)
             df_new = ensure_columns(df_new)
             save_students(df_new)
             st.success("Data dimuat naik & disimpan.")
     with colB:
         st.write("**Muat Turun Data Semasa (CSV)**")
-        df_now = load_students()
+        df_now = st.session_state.df
         st.download_button(
             "Muat Turun CSV",
             data=df_now.to_csv(index=False).encode("utf-8"),
@@ -185,7 +389,20 @@ with tab_import:
 
 with tab_data:
     st.subheader("Senarai & Sunting Pelajar")
-    df = load_students()
+    df = st.session_state.df
+
+    m1, m2, m3 = st.columns(3)
+    m1.metric("Jumlah Pelajar", len(df))
+    currency = cfg.get("currency","RM")
+    m2.metric(f"Kutipan {cfg['ui_labels']['mengaji']}",
+              f"{currency}{sum_paid(df, 'MENGAJI_AMOUNT', 'MENGAJI_STATUS'):.2f}")
+    m3.metric(f"Kutipan {cfg['ui_labels']['silat']}",
+              f"{currency}{sum_paid(df, 'SILAT_AMOUNT', 'SILAT_STATUS'):.2f}")
+
+    # new rows are buffered here and appended in one concat on save,
+    # instead of an O(N) frame copy per added student
+    if "pending_rows" not in st.session_state:
+        st.session_state.pending_rows = []
 
     # Quick add form
     with st.expander("➕ Tambah Pelajar Baharu"):
@@ -205,9 +422,8 @@ with tab_data:
                 "MENGAJI_STATUS": "Belum Bayar", "MENGAJI_AMOUNT": float(mengaji_amt), "MENGAJI_DATE": "",
                 "SILAT_STATUS": "Belum Bayar", "SILAT_AMOUNT": float(silat_amt), "SILAT_DATE": ""
             }
-            df = pd.concat([df, pd.DataFrame([new_row])], ignore_index=True)
-            save_students(ensure_columns(df))
-            st.success("Pelajar ditambah.")
+            st.session_state.pending_rows.append(new_row)
+            st.success(f"Pelajar ditambah ({len(st.session_state.pending_rows)} menunggu simpan).")
 
     st.caption("Edit terus dalam jadual, kemudian klik **Simpan Perubahan**. Untuk buang pelajar, pilih dan tekan **Padam**.")
     edited_df = st.data_editor(
@@ -221,15 +437,21 @@ with tab_data:
     )
     c1, c2 = st.columns(2)
     if c1.button("💾 Simpan Perubahan Data"):
-        save_students(ensure_columns(edited_df))
+        to_save = edited_df
+        if st.session_state.pending_rows:
+            to_save = pd.concat([edited_df, pd.DataFrame(st.session_state.pending_rows)], ignore_index=True)
+            st.session_state.pending_rows = []
+        save_students(ensure_columns(to_save))
         st.success("Perubahan disimpan.")
 
     # Delete selected rows
     with st.expander("🗑️ Padam Pelajar"):
+        # vectorized label build instead of a Python format call per option
+        delete_labels = (edited_df["NAMA"].astype(str) + " • " + edited_df["NO_KP"].astype(str)).tolist()
         to_delete = st.multiselect(
             "Pilih baris untuk dipadam",
             options=list(range(len(edited_df))),
-            format_func=lambda i: f"{edited_df.loc[i,'NAMA']} • {edited_df.loc[i,'NO_KP']}"
+            format_func=delete_labels.__getitem__
         )
         if st.button("Padam Dipilih"):
             if to_delete:
@@ -243,7 +465,7 @@ with tab_receipt:
     st.subheader("Jana Resit (Individu / Bulk) & Cetak")
     os.makedirs(RECEIPTS_DIR, exist_ok=True)
 
-    df = load_students()
+    df = st.session_state.df
     if df.empty:
         st.warning("Tiada data pelajar.")
     else:
@@ -251,14 +473,7 @@ with tab_receipt:
         q = st.text_input("Cari Nama / No. KP / Tingkatan / Kelas", "")
         filtered = df.copy()
         if q.strip():
-            s = q.lower()
-            mask = (
-                df["NAMA"].str.lower().str.contains(s, na=False) |
-                df["NO_KP"].str.lower().str.contains(s, na=False) |
-                df["TINGKATAN"].astype(str).str.lower().str.contains(s, na=False) |
-                df["KELAS"].str.lower().str.contains(s, na=False)
-            )
-            filtered = df[mask].reset_index(drop=True)
+            filtered = search_students(q, _students_mtime())
 
         col1, col2, col3 = st.columns([1,1,1])
         fee_choice = col1.selectbox("Jenis Yuran", [cfg["ui_labels"]["mengaji"], cfg["ui_labels"]["silat"]])
@@ -268,10 +483,13 @@ with tab_receipt:
         list_df = filtered[filtered[status_col]=="Sudah Bayar"] if only_paid else filtered
 
         st.write(f"**{len(list_df)}** rekod dipaparkan.")
+        # vectorized label build instead of four .loc lookups per option per rerun
+        option_labels = (list_df["NAMA"].astype(str) + " • " + list_df["NO_KP"].astype(str) +
+                         " • T" + list_df["TINGKATAN"].astype(str) + " " + list_df["KELAS"].astype(str)).to_dict()
         selected_idx = st.multiselect(
             "Pilih pelajar (untuk resit):",
             options=list_df.index.tolist(),
-            format_func=lambda i: f"{list_df.loc[i,'NAMA']} • {list_df.loc[i,'NO_KP']} • T{list_df.loc[i,'TINGKATAN']} {list_df.loc[i,'KELAS']}"
+            format_func=option_labels.__getitem__
         )
 
         cA, cB, cC = st.columns(3)
@@ -282,7 +500,7 @@ with tab_receipt:
                 if not selected_idx:
                     st.warning("Sila pilih seorang pelajar.")
                 else:
-                    row = list_df.loc[selected_idx[0]]
+                    row = list_df.loc[selected_idx[0]].to_dict()
                     pdf_bytes = generate_single_pdf_bytes(cfg, row, fee_key)
                     # save to receipts folder
                     safe_name = row["NAMA"].replace(" ", "_")
@@ -308,25 +526,29 @@ with tab_receipt:
 
         # Bulk -> separate PDFs, zipped
         with cC:
+            save_copies = st.checkbox("Simpan salinan ke folder 'receipts'", value=False, key="zip_save_copies")
             if st.button("🧾📦 Jana Bulk (Pisah Setiap Pelajar, ZIP)"):
                 if not selected_idx:
                     st.warning("Sila pilih sekurang-kurangnya seorang.")
                 else:
                     mem_zip = io.BytesIO()
                     subset = list_df.loc[selected_idx]
-                    with zipfile.ZipFile(mem_zip, mode="w", compression=zipfile.ZIP_DEFLATED) as zf:
-                        for _, row in subset.iterrows():
-                            pdf_bytes = generate_single_pdf_bytes(cfg, row, fee_key)
-                            safe_name = row["NAMA"].replace(" ","_")
+                    rendered = render_receipts_parallel(cfg, subset.to_dict("records"), fee_key)
+                    # ZipFile isn't thread-safe; write the collected PDFs sequentially.
+                    # PDFs are already deflate-compressed inside, so store them as-is.
+                    with zipfile.ZipFile(mem_zip, mode="w", compression=zipfile.ZIP_STORED) as zf:
+                        for safe_name, pdf_bytes in rendered:
                             file_name = f"resit_{fee_key.lower()}_{safe_name}.pdf"
                             zf.writestr(file_name, pdf_bytes)
-                            # also save to receipts folder
-                            with open(os.path.join(RECEIPTS_DIR, file_name), "wb") as f:
-                                f.write(pdf_bytes)
                     mem_zip.seek(0)
+                    if save_copies:
+                        # unpack from the ZIP we just built instead of writing each PDF twice
+                        zipfile.ZipFile(mem_zip).extractall(RECEIPTS_DIR)
+                        mem_zip.seek(0)
                     zip_name = f"resit_zip_{fee_key.lower()}_{datetime.now().strftime('%Y%m%d_%H%M')}.zip"
                     st.download_button("Muat Turun ZIP Resit", data=mem_zip.getvalue(), file_name=zip_name, mime="application/zip")
-                    st.info("Semua resit individu turut disimpan dalam folder 'receipts'.")
+                    if save_copies:
+                        st.info("Semua resit individu turut disimpan dalam folder 'receipts'.")
 
 with tab_settings:
     st.subheader("Tetapan UI & Resit")